@@ -3,48 +3,242 @@ Flask API Server for Error Classification UI
 Provides REST API endpoints for the React frontend
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import orjson
 import os
+import re
 import csv
-import glob
+import functools
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
-# Import classification modules
-from vector_db_classifier import VectorKnowledgeBase, initialize_vector_db
-from semantic_search import DocumentationSearchEngine
+# Classification engines are imported lazily by their loaders below
 from constants import DOCS_ROOT_DIR, DATASET_PATH, CHECKPOINT_DIR
-import joblib
-import numpy as np
+from doc_scanner import (
+    get_all_doc_files, get_doc_entries, find_similar_doc, forget_doc, read_doc, read_docs, reset_scan_cache
+)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson; types orjson can't encode go through Flask's default hook."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
+# Service/category names become path components, so only plain names are allowed
+_DOC_NAME_RE = re.compile(r'[\w-]+')
+_ABS_DOCS_ROOT = os.path.realpath(DOCS_ROOT_DIR)
+
+# Path cleanup for predicted doc paths, which may use either separator
+_PATH_SEP_RE = re.compile(r'[\\/]+')
+_DOUBLED_SERVICES_RE = re.compile(r'([\\/])services\1services\1')
+
+# Parsed dataset CSV, re-read only when the file's mtime or size changes.
+# generation counts every change the cache has seen; a rewrite within one mtime tick can keep
+# the stamp, so the ETag includes both.
+_dataset_lock = threading.Lock()
+_dataset_cache = {'stamp': None, 'generation': 0, 'header': [], 'rows': []}
+_DATASET_HEADER = ['Timestamp', 'Service', 'Error_Category', 'Raw_Input_Snippet', 'Root_Cause']
+
+def engine_disabled(name):
+    """Engines can be switched off with DISABLE_<NAME>=1 (VECTOR_DB, SEMANTIC_SEARCH, RANDOM_FOREST)."""
+    return os.environ.get(f'DISABLE_{name}') == '1'
+
+
+# The engine modules pull in torch, sentence-transformers, chromadb and scikit-learn, so they are
+# imported only for enabled engines rather than at module import. Each _import_* runs on the main
+# thread and returns the loader to run on the pool: concurrent first imports of the same heavy
+# packages from several threads can deadlock on Python's per-module import locks.
+def _import_vector_kb():
+    from vector_db_classifier import initialize_vector_db
+    return initialize_vector_db
+
+
+def _import_semantic_search():
+    from semantic_search import DocumentationSearchEngine
+    return functools.partial(DocumentationSearchEngine, docs_root_dir=DOCS_ROOT_DIR)
+
+
+def _import_rf_model():
+    import joblib
+    # Unpickling the checkpoint imports these, so load them here rather than on the pool
+    import sklearn.pipeline, sklearn.ensemble, sklearn.feature_extraction.text  # noqa: E401,F401
+    return functools.partial(_load_rf_model, joblib)
+
+
+def _load_rf_model(joblib):
+    """Load the latest Random Forest checkpoint, or return None if none was saved yet."""
+    latest_model = os.path.join(CHECKPOINT_DIR, 'latest_model.pkl')
+    if os.path.exists(latest_model):
+        model = joblib.load(latest_model)
+        # Waitress already serves requests on several threads; a per-query thread pool
+        # on every core would only oversubscribe the CPU
+        model.set_params(clf__n_jobs=1)
+        return model
+    return None
+
+
+def _submit_engine(executor, name, import_loader):
+    """Import an enabled engine on this thread and submit its loader to executor.
+
+    Returns None when the engine is disabled. An import error is returned as a failed
+    future, so it is reported like any other load failure.
+    """
+    if engine_disabled(name):
+        return None
+    try:
+        loader = import_loader()
+    except Exception as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+    return executor.submit(loader)
+
+
 # Initialize models
 print("Initializing models...")
 vector_kb = None
 semantic_search = None
 rf_model = None
 
-try:
-    vector_kb = initialize_vector_db()
-    print("✓ Vector DB initialized")
-except Exception as e:
-    print(f"✗ Vector DB failed: {e}")
+# The engines are independent and their load time is mostly disk reads and native code that
+# releases the GIL, so load them side by side: startup takes about as long as the slowest one.
+with ThreadPoolExecutor(max_workers=3) as executor:
+    vector_kb_future = _submit_engine(executor, 'VECTOR_DB', _import_vector_kb)
+    semantic_search_future = _submit_engine(executor, 'SEMANTIC_SEARCH', _import_semantic_search)
+    rf_model_future = _submit_engine(executor, 'RANDOM_FOREST', _import_rf_model)
 
-try:
-    semantic_search = DocumentationSearchEngine(docs_root_dir=DOCS_ROOT_DIR)
-    print("✓ Semantic Search initialized")
-except Exception as e:
-    print(f"✗ Semantic Search failed: {e}")
+if vector_kb_future is None:
+    print("- Vector DB disabled (DISABLE_VECTOR_DB=1)")
+else:
+    try:
+        vector_kb = vector_kb_future.result()
+        print("✓ Vector DB initialized")
+    except Exception as e:
+        print(f"✗ Vector DB failed: {e}")
 
-try:
-    latest_model = os.path.join(CHECKPOINT_DIR, 'latest_model.pkl')
-    if os.path.exists(latest_model):
-        rf_model = joblib.load(latest_model)
-        print("✓ Random Forest model loaded")
-except Exception as e:
-    print(f"✗ Random Forest model failed: {e}")
+if semantic_search_future is None:
+    print("- Semantic Search disabled (DISABLE_SEMANTIC_SEARCH=1)")
+else:
+    try:
+        semantic_search = semantic_search_future.result()
+        print("✓ Semantic Search initialized")
+    except Exception as e:
+        print(f"✗ Semantic Search failed: {e}")
+
+if rf_model_future is None:
+    print("- Random Forest disabled (DISABLE_RANDOM_FOREST=1)")
+else:
+    try:
+        rf_model = rf_model_future.result()
+        if rf_model is not None:
+            print("✓ Random Forest model loaded")
+    except Exception as e:
+        print(f"✗ Random Forest model failed: {e}")
+
+# Warm the docs scan so the first request doesn't pay for the tree walk.
+# Later calls re-validate it with a stat per directory, so no refresh thread is needed.
+print(f"✓ Docs scan cached ({len(get_all_doc_files())} files)")
+
+
+def is_valid_doc_path(doc_path):
+    """Check that doc_path is a markdown file inside DOCS_ROOT_DIR (symlinks resolved)."""
+    if not doc_path or '\x00' in doc_path or not doc_path.endswith('.md'):
+        return False
+    try:
+        real_path = os.path.realpath(doc_path)
+        return os.path.commonpath([real_path, _ABS_DOCS_ROOT]) == _ABS_DOCS_ROOT
+    except ValueError:
+        return False
+
+
+def predict_rf(query_text):
+    """
+    Classify with the Random Forest using one predict_proba pass.
+    predict() is argmax(predict_proba), so calling both would run TF-IDF and every tree twice.
+    Returns: (doc_path, confidence)
+    """
+    probs = rf_model.predict_proba([query_text])[0]
+    best = probs.argmax()
+    return rf_model.classes_[best], float(probs[best] * 100)
+
+
+# Engine results memoized per query text. Repeated alert texts skip embedding, search and
+# tree traversal; verify_and_fallback still checks the returned path on every request.
+# Only the Vector DB changes at runtime (update-kb, teach-correction), which clears its cache.
+@functools.lru_cache(maxsize=2048)
+def classify_vector_db(query_text):
+    """Returns: (doc_path, confidence, source, root_cause)"""
+    result = vector_kb.search(query_text)
+    confidence = parse_confidence(result.get('confidence', 'Unknown'))
+    return result['doc_path'], confidence, result['source'], result.get('root_cause', '')
+
+
+@functools.lru_cache(maxsize=2048)
+def classify_semantic(query_text):
+    """Returns: (doc_path, confidence)"""
+    doc_path, confidence = semantic_search.find_relevant_doc(query_text)
+    return doc_path, float(confidence)
+
+
+@functools.lru_cache(maxsize=2048)
+def classify_rf(query_text):
+    """Returns: (doc_path, confidence)"""
+    return predict_rf(query_text)
+
+
+def doc_has_content(filepath, content):
+    """Check whether filepath already holds exactly content, so a write can be skipped."""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read() == content.encode('utf-8')
+    except FileNotFoundError:
+        return False
+
+
+def etag_for(*parts):
+    """Strong ETag derived from parts that identify a response's version (e.g. a file's mtime and size)."""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def not_modified(etag):
+    """Return a 304 response if the client already has etag, else None (so the body is never built)."""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def json_with_etag(payload, etag=None):
+    """
+    jsonify payload with an ETag (a hash of the body if etag is None) and let clients revalidate.
+    Answers 304 instead when If-None-Match already matches.
+    """
+    response = jsonify(payload)
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 def verify_and_fallback(doc_path, query_text, method):
@@ -54,8 +248,8 @@ def verify_and_fallback(doc_path, query_text, method):
     """
     # Normalize path and fix common issues (e.g., doubled 'services')
     doc_path = os.path.normpath(doc_path)
-    doc_path = doc_path.replace('/services/services/', '/services/')
-    doc_path = doc_path.replace('\\services\\services\\', '\\services\\')
+    if 'services' in doc_path:
+        doc_path = _DOUBLED_SERVICES_RE.sub(r'\1services\1', doc_path)
     
     # Check if the predicted path exists
     if os.path.exists(doc_path):
@@ -70,10 +264,8 @@ def verify_and_fallback(doc_path, query_text, method):
     # Try Vector DB if not the original method
     if method != 'VECTOR_DB' and vector_kb:
         try:
-            result = vector_kb.search(query_text)
-            fallback_path = result['doc_path']
+            fallback_path, confidence, _, _ = classify_vector_db(query_text)
             if os.path.exists(fallback_path):
-                confidence = parse_confidence(result.get('confidence', 'Unknown'))
                 print(f"✓ Fallback: Vector DB found valid path")
                 return fallback_path, confidence, 'VECTOR_DB (Fallback)', True
             fallback_results.append(('VECTOR_DB', fallback_path))
@@ -83,10 +275,10 @@ def verify_and_fallback(doc_path, query_text, method):
     # Try Semantic Search if not the original method
     if method != 'SEMANTIC_SEARCH' and semantic_search:
         try:
-            fallback_path, confidence = semantic_search.find_relevant_doc(query_text)
+            fallback_path, confidence = classify_semantic(query_text)
             if os.path.exists(fallback_path):
                 print(f"✓ Fallback: Semantic Search found valid path")
-                return fallback_path, float(confidence), 'SEMANTIC_SEARCH (Fallback)', True
+                return fallback_path, confidence, 'SEMANTIC_SEARCH (Fallback)', True
             fallback_results.append(('SEMANTIC_SEARCH', fallback_path))
         except Exception as e:
             print(f"✗ Semantic Search fallback failed: {e}")
@@ -94,10 +286,8 @@ def verify_and_fallback(doc_path, query_text, method):
     # Try Random Forest if not the original method
     if method != 'RANDOM_FOREST' and rf_model:
         try:
-            prediction = rf_model.predict([query_text])[0]
-            probs = rf_model.predict_proba([query_text])
+            prediction, confidence = classify_rf(query_text)
             if os.path.exists(prediction):
-                confidence = float(np.max(probs) * 100)
                 print(f"✓ Fallback: Random Forest found valid path")
                 return prediction, confidence, 'RANDOM_FOREST (Fallback)', True
             fallback_results.append(('RANDOM_FOREST', prediction))
@@ -109,21 +299,18 @@ def verify_and_fallback(doc_path, query_text, method):
     print(f"🔍 Searching for closest existing documentation file...")
     
     # Get all available docs
-    pattern = os.path.join(DOCS_ROOT_DIR, '**', '*.md')
-    available_files = glob.glob(pattern, recursive=True)
+    available_files = get_all_doc_files()
     
     if available_files:
         # Try to match by service and category from the original path
-        doc_parts = doc_path.replace('\\', '/').split('/')
+        doc_parts = _PATH_SEP_RE.split(doc_path)
         
-        # Look for files with similar names
-        for file in available_files:
-            file_parts = file.replace('\\', '/').split('/')
-            if len(doc_parts) >= 2 and len(file_parts) >= 2:
-                # Check if service and category match
-                if doc_parts[-2] == file_parts[-2] or doc_parts[-1] == file_parts[-1]:
-                    print(f"✓ Found similar file: {file}")
-                    return file, 50.0, f'{method} (Best Match)', True
+        # Look up a file in the same service dir or with the same filename
+        if len(doc_parts) >= 2:
+            file = find_similar_doc(doc_parts[-2], doc_parts[-1])
+            if file:
+                print(f"✓ Found similar file: {file}")
+                return file, 50.0, f'{method} (Best Match)', True
         
         # If no similar file found, return the first available doc
         print(f"✓ Using first available doc as last resort: {available_files[0]}")
@@ -157,27 +344,20 @@ def classify_error():
             if not vector_kb:
                 return jsonify({'error': 'Vector DB not available'}), 503
             
-            result = vector_kb.search(query_text)
-            doc_path = result['doc_path']
-            confidence = parse_confidence(result.get('confidence', 'Unknown'))
-            source = result['source']
-            root_cause = result.get('root_cause', '')
+            doc_path, confidence, source, root_cause = classify_vector_db(query_text)
 
         elif method == 'SEMANTIC_SEARCH':
             if not semantic_search:
                 return jsonify({'error': 'Semantic Search not available'}), 503
             
-            doc_path, confidence = semantic_search.find_relevant_doc(raw_snippet)
-            confidence = float(confidence)
+            doc_path, confidence = classify_semantic(raw_snippet)
             source = 'SEMANTIC_SEARCH'
 
         elif method == 'RANDOM_FOREST':
             if not rf_model:
                 return jsonify({'error': 'Random Forest model not available'}), 503
             
-            doc_path = rf_model.predict([query_text])[0]
-            probs = rf_model.predict_proba([query_text])
-            confidence = float(np.max(probs) * 100)
+            doc_path, confidence = classify_rf(query_text)
             source = 'RANDOM_FOREST'
 
         else:
@@ -220,27 +400,24 @@ def get_docs():
     """Get all documentation files"""
     try:
         docs = []
-        pattern = os.path.join(DOCS_ROOT_DIR, '**', '*.md')
-        files = glob.glob(pattern, recursive=True)
         
-        for idx, filepath in enumerate(files):
-            parts = filepath.split(os.sep)
-            service = parts[-2] if len(parts) > 1 else 'unknown'
-            category = os.path.splitext(parts[-1])[0] if parts else 'unknown'
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+        # Metadata only: the UI fetches a file's content via /api/doc-content when it opens it
+        for idx, (filepath, service, category) in enumerate(get_doc_entries()):
+            try:
+                size = os.stat(filepath).st_size
+            except FileNotFoundError:
+                continue
             
             docs.append({
                 'id': idx,
                 'service': service,
                 'category': category,
                 'path': filepath,
-                'content': content,
-                'size': f"{len(content)} chars"
+                'size': f"{size} bytes"
             })
         
-        return jsonify(docs)
+        # The listing is stat-bound; tagging it by body hash lets pollers skip the download
+        return json_with_etag(docs)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -255,23 +432,55 @@ def get_doc_content():
             return jsonify({'error': 'path parameter is required'}), 400
         
         # Security check: ensure the path is within DOCS_ROOT_DIR
-        abs_path = os.path.abspath(doc_path)
-        abs_docs_root = os.path.abspath(DOCS_ROOT_DIR)
-        
-        if not abs_path.startswith(abs_docs_root) and not os.path.exists(doc_path):
+        if not is_valid_doc_path(doc_path):
             return jsonify({'error': 'Invalid document path'}), 400
         
-        if not os.path.exists(doc_path):
+        # raw=1: hand the file to the WSGI server's file wrapper instead of reading it into a JSON body
+        # (conditional=True also answers Range and If-Modified-Since/If-None-Match requests)
+        if request.args.get('raw') == '1':
+            try:
+                return send_file(os.path.abspath(doc_path), mimetype='text/markdown', conditional=True)
+            except FileNotFoundError:
+                return jsonify({'error': 'Document not found'}), 404
+        
+        content = read_doc(doc_path)
+        if content is None:
             return jsonify({'error': 'Document not found'}), 404
         
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Tag by content rather than mtime and size: a same-size edit within one mtime tick would
+        # otherwise keep the old tag. read_doc serves from memory, so a 304 still costs only a stat.
+        etag = etag_for(content)
+        cached = not_modified(etag)
+        if cached:
+            return cached
         
-        return jsonify({
+        return json_with_etag({
             'path': doc_path,
             'content': content,
             'size': len(content)
-        })
+        }, etag)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/docs/bulk', methods=['POST'])
+def get_docs_bulk():
+    """Get the content of several documentation files in one request"""
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        paths = data.get('paths')
+        
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            return jsonify({'error': 'paths must be a list of document paths'}), 400
+        
+        invalid_paths = [path for path in paths if not is_valid_doc_path(path)]
+        if invalid_paths:
+            return jsonify({'error': f'Invalid document path: {invalid_paths[0]}'}), 400
+        
+        # Files are read concurrently; documents that don't exist map to null
+        return jsonify(dict(zip(paths, read_docs(paths))))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -287,10 +496,22 @@ def update_doc(doc_id):
         if not filepath or not content:
             return jsonify({'error': 'path and content are required'}), 400
         
+        if not is_valid_doc_path(filepath):
+            return jsonify({'error': 'Invalid document path'}), 400
+        
+        # Identical content: skip the write so file and directory mtimes (and the caches keyed on them) stay put
+        if doc_has_content(filepath, content):
+            return jsonify({'message': 'Documentation unchanged'})
+        
         # Write the file
+        is_new = not os.path.exists(filepath)
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
+        forget_doc(filepath)
+        # Directory mtimes can be too coarse to notice a file added in the same tick
+        if is_new:
+            reset_scan_cache()
         
         return jsonify({'message': 'Documentation updated successfully'})
     except Exception as e:
@@ -309,13 +530,21 @@ def create_doc():
         if not service or not category or not content:
             return jsonify({'error': 'service, category, and content are required'}), 400
         
+        if not _DOC_NAME_RE.fullmatch(service) or not _DOC_NAME_RE.fullmatch(category):
+            return jsonify({'error': 'service and category may only contain letters, digits, "_" and "-"'}), 400
+        
         # Create file path (DOCS_ROOT_DIR already includes 'services')
         filepath = os.path.join(DOCS_ROOT_DIR, service.lower(), f"{category}.md")
         
+        if doc_has_content(filepath, content):
+            return jsonify({'message': 'Documentation unchanged', 'path': filepath})
+        
         # Write the file
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(content)
+        forget_doc(filepath)
+        reset_scan_cache()
         
         return jsonify({'message': 'Documentation created successfully', 'path': filepath})
     except Exception as e:
@@ -327,20 +556,82 @@ def delete_doc(doc_id):
     """Delete a documentation file"""
     try:
         # Get the file path from the list
-        pattern = os.path.join(DOCS_ROOT_DIR, '**', '*.md')
-        files = glob.glob(pattern, recursive=True)
+        files = get_all_doc_files()
         
         if doc_id >= len(files):
             return jsonify({'error': 'Document not found'}), 404
         
         filepath = files[doc_id]
         os.remove(filepath)
+        forget_doc(filepath)
+        reset_scan_cache()
         
         return jsonify({'message': 'Documentation deleted successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _load_dataset():
+    """
+    Return (header, rows) for the dataset CSV, parsing it only if it changed since the last call.
+    Callers must hold _dataset_lock and must treat the returned rows as read-only.
+    A missing file reads as an empty dataset (stamp None).
+    """
+    try:
+        stat = os.stat(DATASET_PATH)
+    except FileNotFoundError:
+        if _dataset_cache['stamp'] is not None:
+            _dataset_cache.update(stamp=None, generation=_dataset_cache['generation'] + 1, header=[], rows=[])
+        return _dataset_cache['header'], _dataset_cache['rows']
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if _dataset_cache['stamp'] != stamp:
+        with open(DATASET_PATH, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = list(reader)
+        _dataset_cache.update(stamp=stamp, generation=_dataset_cache['generation'] + 1, header=header, rows=rows)
+    return _dataset_cache['header'], _dataset_cache['rows']
+
+
+def _store_dataset(header, rows):
+    """After a successful write through the API, cache header and rows as the file's content without re-parsing it."""
+    stat = os.stat(DATASET_PATH)
+    _dataset_cache.update(
+        stamp=(stat.st_mtime_ns, stat.st_size),
+        generation=_dataset_cache['generation'] + 1,
+        header=header,
+        rows=rows,
+    )
+
+
+def _ends_with_newline(path):
+    """Check the last byte of a non-empty file."""
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in (b'\n', b'\r')
+
+
+def _csv_row(values):
+    """Convert values the way csv.writer writes them, so cached rows match a re-parse of the file."""
+    return ['' if value is None else str(value) for value in values]
+
+
+def _write_dataset(header, rows):
+    """
+    Rewrite the dataset CSV from already-parsed rows (no re-read of the old file).
+    The new content goes to a temp file that replaces the dataset in one step, so readers
+    and a crash mid-write never see a truncated CSV.
+    """
+    tmp_path = DATASET_PATH + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, DATASET_PATH)
+    _store_dataset(header, rows)
+
+
 @app.route('/api/dataset', methods=['GET'])
 def get_dataset():
     """Get all dataset records"""
@@ -350,9 +641,19 @@ def get_dataset():
         if not os.path.exists(DATASET_PATH):
             return jsonify([])
         
-        with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for idx, row in enumerate(reader):
+        with _dataset_lock:
+            header, rows = _load_dataset()
+            # The stamp alone can repeat after a same-size rewrite in one mtime tick
+            etag = etag_for(_dataset_cache['stamp'], _dataset_cache['generation'])
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            
+            # Ids are row positions, the same indexes update/delete use
+            for idx, values in enumerate(rows):
+                if not values:
+                    continue
+                row = dict(zip(header, values))
                 records.append({
                     'id': idx,
                     'timestamp': row.get('Timestamp', ''),
@@ -362,7 +663,7 @@ def get_dataset():
                     'root_cause': row.get('Root_Cause', '')
                 })
         
-        return jsonify(records)
+        return json_with_etag(records, etag)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -378,16 +679,30 @@ def add_dataset_record():
         if not all(field in data for field in required):
             return jsonify({'error': 'Missing required fields'}), 400
         
+        record = _csv_row([
+            data.get('timestamp', datetime.now().isoformat()),
+            data['service'],
+            data['error_category'],
+            data['raw_input_snippet'],
+            data['root_cause']
+        ])
+        
         # Append to CSV
-        with open(DATASET_PATH, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                data.get('timestamp', datetime.now().isoformat()),
-                data['service'],
-                data['error_category'],
-                data['raw_input_snippet'],
-                data['root_cause']
-            ])
+        with _dataset_lock:
+            header, rows = _load_dataset()
+            if not header:
+                # No dataset yet (or an empty file): start one with the standard header
+                os.makedirs(os.path.dirname(DATASET_PATH), exist_ok=True)
+                header = _DATASET_HEADER
+            with open(DATASET_PATH, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if not f.tell():
+                    writer.writerow(header)
+                # The last line may lack a newline; the record would otherwise be glued onto it
+                elif not _ends_with_newline(DATASET_PATH):
+                    f.write('\n')
+                writer.writerow(record)
+            _store_dataset(header, rows + [record])
         
         return jsonify({'message': 'Record added successfully'})
     except Exception as e:
@@ -400,30 +715,24 @@ def update_dataset_record(record_id):
     try:
         data = request.json
         
-        # Read all records
-        records = []
-        with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            records = list(reader)
-        
-        if record_id >= len(records):
-            return jsonify({'error': 'Record not found'}), 404
-        
-        # Update the record
-        records[record_id] = [
-            data.get('timestamp', records[record_id][0]),
-            data.get('service', records[record_id][1]),
-            data.get('error_category', records[record_id][2]),
-            data.get('raw_input_snippet', records[record_id][3]),
-            data.get('root_cause', records[record_id][4])
-        ]
-        
-        # Write back
-        with open(DATASET_PATH, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-            writer.writerows(records)
+        with _dataset_lock:
+            header, records = _load_dataset()
+            
+            if record_id >= len(records):
+                return jsonify({'error': 'Record not found'}), 404
+            
+            # Update the record (on a copy, so a failed write leaves the cache intact)
+            records = list(records)
+            records[record_id] = _csv_row([
+                data.get('timestamp', records[record_id][0]),
+                data.get('service', records[record_id][1]),
+                data.get('error_category', records[record_id][2]),
+                data.get('raw_input_snippet', records[record_id][3]),
+                data.get('root_cause', records[record_id][4])
+            ])
+            
+            # Write back
+            _write_dataset(header, records)
         
         return jsonify({'message': 'Record updated successfully'})
     except Exception as e:
@@ -434,24 +743,17 @@ def update_dataset_record(record_id):
 def delete_dataset_record(record_id):
     """Delete a dataset record"""
     try:
-        # Read all records
-        records = []
-        with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            records = list(reader)
-        
-        if record_id >= len(records):
-            return jsonify({'error': 'Record not found'}), 404
-        
-        # Remove the record
-        records.pop(record_id)
-        
-        # Write back
-        with open(DATASET_PATH, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-            writer.writerows(records)
+        with _dataset_lock:
+            header, records = _load_dataset()
+            
+            if record_id >= len(records):
+                return jsonify({'error': 'Record not found'}), 404
+            
+            # Remove the record (on a copy, so a failed write leaves the cache intact)
+            records = records[:record_id] + records[record_id + 1:]
+            
+            # Write back
+            _write_dataset(header, records)
         
         return jsonify({'message': 'Record deleted successfully'})
     except Exception as e:
@@ -460,10 +762,17 @@ def delete_dataset_record(record_id):
 
 @app.route('/api/update-kb', methods=['POST'])
 def update_kb():
-    """Update the knowledge base (re-index vector DB)"""
+    """Update the knowledge base (sync the vector DB with the dataset)"""
     try:
         global vector_kb
-        vector_kb = initialize_vector_db()
+        if vector_kb is None:
+            if engine_disabled('VECTOR_DB'):
+                return jsonify({'error': 'Vector DB is disabled'}), 503
+            vector_kb = _import_vector_kb()()
+        else:
+            # Only rows that changed since the last sync are re-embedded
+            vector_kb.sync_with_dataset(DATASET_PATH)
+        classify_vector_db.cache_clear()
         return jsonify({'message': 'Knowledge base updated successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -485,6 +794,8 @@ def teach_correction():
         
         # Teach the system
         vector_kb.teach_system(error_text, correct_doc_path)
+        # A new correction can change the answer for any cached query
+        classify_vector_db.cache_clear()
         
         return jsonify({'message': 'Correction learned successfully'})
     except Exception as e:
@@ -534,7 +845,14 @@ def parse_confidence(confidence):
 
 
 if __name__ == '__main__':
-    print("\nFlask API Server starting...")
-    print("React UI should be available at: http://localhost:3000")
-    print("API endpoints available at: http://localhost:5000/api/*")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    print(
+        "\nFlask API Server starting...\n"
+        "React UI should be available at: http://localhost:3000\n"
+        "API endpoints available at: http://localhost:5000/api/*"
+    )
+    if os.environ.get('FLASK_DEBUG') == '1':
+        # Dev server with auto-reload (reloads the models on every restart)
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=5000, threads=8)
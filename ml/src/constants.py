@@ -8,6 +8,8 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 # Model paths
 CHECKPOINT_DIR = os.path.join(MODELS_DIR, 'checkpoints')
 CHROMA_DB_DIR = os.path.join(MODELS_DIR, 'chroma_db')
+DOC_EMBEDDINGS_PATH = os.path.join(MODELS_DIR, 'doc_embeddings.npy')
+DOC_EMBEDDINGS_MANIFEST_PATH = os.path.join(MODELS_DIR, 'doc_embeddings.json')
 
 # Data paths
 DOCS_ROOT_DIR = os.path.join(DATA_DIR, 'services')
@@ -0,0 +1,166 @@
+"""
+Documentation tree scanner shared by the API server and the search engines.
+The markdown file list is cached and only re-scanned when a directory in the tree changes;
+file contents are cached until the file's mtime or size changes.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from constants import DOCS_ROOT_DIR
+
+# Directories that never hold documentation; skipped without descending into them
+_IGNORED_DIRS = {'node_modules', '__pycache__', 'venv'}
+
+_scan_lock = threading.Lock()
+_scan_cache = {}
+
+# path -> ((mtime_ns, size), text) for files already read
+_content_cache = {}
+
+
+def _scan_tree(root):
+    """
+    Walk root once, returning sorted (path, service, category) entries for every
+    markdown file and the mtime of every directory.
+    """
+    entries = []
+    dir_mtimes = {}
+    stack = [root]
+
+    while stack:
+        dirpath = stack.pop()
+        try:
+            # Stat before listing: a change made while the directory is listed then leaves a
+            # newer mtime than the recorded one, so the next freshness check re-scans it
+            mtime_ns = os.stat(dirpath).st_mtime_ns
+            with os.scandir(dirpath) as it:
+                children = list(it)
+        except OSError:
+            continue
+        dir_mtimes[dirpath] = mtime_ns
+
+        # Service and category come straight from the walk, not from re-splitting paths
+        service = os.path.basename(dirpath)
+        for entry in children:
+            # Same matching rules as glob('**/*.md'): hidden entries are skipped
+            if entry.name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # Like os.walk, symlinked directories are not followed
+                if entry.name not in _IGNORED_DIRS and not entry.is_symlink():
+                    stack.append(entry.path)
+            elif entry.name.endswith('.md'):
+                entries.append((entry.path, service, entry.name[:-len('.md')]))
+
+    entries.sort()
+    return entries, dir_mtimes
+
+
+def _is_fresh(scan):
+    """A scan is still valid while no directory in it was added to, removed from or renamed."""
+    if not scan['dir_mtimes']:
+        return False
+
+    for dirpath, mtime_ns in scan['dir_mtimes'].items():
+        try:
+            if os.stat(dirpath).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _get_scan(root):
+    if root is None:
+        root = DOCS_ROOT_DIR
+
+    with _scan_lock:
+        scan = _scan_cache.get(root)
+        if scan is None or not _is_fresh(scan):
+            entries, dir_mtimes = _scan_tree(root)
+            # First (sorted) file per service dir and per filename, for O(1) similar-doc lookups
+            by_service = {}
+            by_filename = {}
+            for path, service, _ in entries:
+                by_service.setdefault(service, path)
+                by_filename.setdefault(os.path.basename(path), path)
+            scan = {
+                'entries': entries,
+                'files': [path for path, _, _ in entries],
+                'by_service': by_service,
+                'by_filename': by_filename,
+                'dir_mtimes': dir_mtimes,
+            }
+            _scan_cache[root] = scan
+        return scan
+
+
+def get_all_doc_files(root=None):
+    """Return the sorted list of markdown files under root (defaults to DOCS_ROOT_DIR)."""
+    return list(_get_scan(root)['files'])
+
+
+def get_doc_entries(root=None):
+    """Return sorted (path, service, category) tuples for every markdown file under root."""
+    return list(_get_scan(root)['entries'])
+
+
+def find_similar_doc(service, filename, root=None):
+    """
+    Return the first doc (in sorted order) whose service dir is service or whose
+    filename is filename, or None if neither matches.
+    """
+    scan = _get_scan(root)
+    candidates = [path for path in (scan['by_service'].get(service), scan['by_filename'].get(filename)) if path]
+    return min(candidates) if candidates else None
+
+
+def reset_scan_cache():
+    """Drop all cached scans so the next call walks the tree again."""
+    with _scan_lock:
+        _scan_cache.clear()
+
+
+def forget_doc(path):
+    """Drop the cached text of path after writing it (a same-size rewrite can keep the old mtime on coarse filesystems)."""
+    _content_cache.pop(path, None)
+
+
+def read_doc(path):
+    """
+    Return the text of a doc file, or None if it does not exist.
+    The text is kept in memory and reused while the file's mtime and size are unchanged.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _content_cache.pop(path, None)
+        return None
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _content_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        _content_cache.pop(path, None)
+        return None
+    # If the file changed after the stat, the stale stamp just forces a re-read next time
+    _content_cache[path] = (stamp, content)
+    return content
+
+
+def read_docs(paths, max_workers=16):
+    """Read several doc files concurrently; results follow the order of paths."""
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(read_doc, paths))
@@ -1,11 +1,35 @@
 """
 Interactive feedback session for the Vector DB Classifier.
 Allows users to test error classification and provide corrections.
+Queries can also be classified in one batch from a file or piped stdin.
 """
 
+import sys
 from vector_db_classifier import initialize_vector_db
 
 
+def print_result(result):
+    """Print a single classification result."""
+    print(f"\nAI Suggestion:")
+    print(f"\t*Doc Path:\t{result['doc_path']}")
+    print(f"\t*Source:\t{result['source']}")
+    if 'confidence' in result:
+        print(f"\t*Confidence:\t{result['confidence']}")
+
+
+def run_batch(kb, queries):
+    """Classify a list of error logs in one batched search (no feedback prompts)."""
+    queries = [query.strip() for query in queries if query.strip()]
+    results = kb.search_batch(queries)
+
+    for query, result in zip(queries, results):
+        print(f"\n>> Error Log: {query}")
+        print_result(result)
+        print("-" * 40)
+
+    return results
+
+
 def run_interactive_session(kb=None):
     """Run interactive feedback session with the vector database."""
     if kb is None:
@@ -31,11 +55,7 @@ def run_interactive_session(kb=None):
         result = kb.search(user_input)
         
         # Display the result
-        print(f"\nAI Suggestion:")
-        print(f"\t*Doc Path:\t{result['doc_path']}")
-        print(f"\t*Source:\t{result['source']}")
-        if 'confidence' in result:
-             print(f"\t*Confidence:\t{result['confidence']}")
+        print_result(result)
         
         # Feedback mechanism
         user_feedback = input("\nIs this correct? (y/n): ").lower().strip()
@@ -58,4 +78,10 @@ def run_interactive_session(kb=None):
 
 
 if __name__ == "__main__":
-    run_interactive_session()
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            run_batch(initialize_vector_db(), f.readlines())
+    elif not sys.stdin.isatty():
+        run_batch(initialize_vector_db(), sys.stdin.readlines())
+    else:
+        run_interactive_session()
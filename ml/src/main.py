@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import os
 import json
+import shutil
 import joblib
 from datetime import datetime
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -13,32 +14,45 @@ os.makedirs(CHECKPOINT_DIR, exist_ok=True)
 
 def load_and_prep_data(csv_path):
     """Load the CSV"""
-    records = []
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"Dataset not found at {csv_path}")
         
     with open(csv_path, encoding='utf-8') as fh:
         header = fh.readline().strip().split(',')
-        for line_number, line in enumerate(fh, start=2):
-            raw_line = line.rstrip('\n')
-            if not raw_line:
-                continue
-            base_parts = raw_line.split(',', 3)
-            if len(base_parts) < 4:
-                print(f"[Warning] Line {line_number} skipped (malformed)")
-                continue
-            try:
-                raw_snippet, root_cause = base_parts[3].rsplit(',', 1)
-            except ValueError as exc:
-                print(f"[Warning] Line {line_number} skipped (missing root cause)")
-                continue
-            row_values = base_parts[:3] + [raw_snippet.strip(), root_cause.strip()]
-            records.append(row_values)
-    
-    df = pd.DataFrame(records, columns=header)
-
-    df['target_doc'] = df.apply(lambda row:
-        f"{DOCS_ROOT_DIR}\\services\\{row['Service'].lower()}\\{row['Error_Category']}.md", axis=1)
+        lines = pd.Series(fh.read().split('\n'), dtype=object)
+
+    # Index by file line number (line 1 is the header) so warnings point at the right line
+    lines.index = lines.index + 2
+    lines = lines[lines != '']
+
+    # Raw_Input_Snippet may contain unquoted commas, so read_csv cannot tokenize the file.
+    # Split on the first three commas, then take the root cause from after the last one.
+    base_parts = lines.str.split(',', n=3, expand=True).reindex(columns=range(4)).astype(object)
+    malformed = base_parts[3].isna()
+    for line_number in base_parts.index[malformed]:
+        print(f"[Warning] Line {line_number} skipped (malformed)")
+    base_parts = base_parts[~malformed]
+
+    tail_parts = base_parts[3].str.rpartition(',').reindex(columns=range(3)).astype(object)
+    missing_cause = tail_parts[1] != ','
+    for line_number in tail_parts.index[missing_cause]:
+        print(f"[Warning] Line {line_number} skipped (missing root cause)")
+    base_parts = base_parts[~missing_cause]
+    tail_parts = tail_parts[~missing_cause]
+
+    df = pd.DataFrame({
+        header[0]: base_parts[0],
+        header[1]: base_parts[1],
+        header[2]: base_parts[2],
+        header[3]: tail_parts[0].str.strip(),
+        header[4]: tail_parts[2].str.strip(),
+    }).reset_index(drop=True)
+
+    df['target_doc'] = (
+        DOCS_ROOT_DIR + "\\services\\" +
+        df['Service'].str.lower() + "\\" +
+        df['Error_Category'] + ".md"
+    )
 
     df['combined_features'] = (
         df['Service'] + " " +
@@ -49,10 +63,11 @@ def load_and_prep_data(csv_path):
 
     return df
 
-def build_model():
+def build_model(sublinear_tf=False):
     text_clf = Pipeline([
-        ('tfidf', TfidfVectorizer(ngram_range=(1, 2), analyzer='word')), 
-        ('clf', RandomForestClassifier(n_estimators=100, random_state=42)),
+        ('tfidf', TfidfVectorizer(ngram_range=(1, 2), analyzer='word', sublinear_tf=sublinear_tf,
+                                  dtype=np.float32)), 
+        ('clf', RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)),
     ])
     return text_clf
 
@@ -61,17 +76,31 @@ def save_checkpoint(model):
     filename = f"model_v1_{timestamp}.pkl"
     filepath = os.path.join(CHECKPOINT_DIR, filename)
     
-    joblib.dump(model, filepath)
+    # zlib level 3: about 9x smaller on disk for a few ms of extra load time, and every
+    # retrain keeps its own timestamped checkpoint
+    joblib.dump(model, filepath, compress=3)
     print(f"\n[Checkpoint] Model saved successfully to: {filepath}")
     
     latest_path = os.path.join(CHECKPOINT_DIR, "latest_model.pkl")
-    joblib.dump(model, latest_path)
+    # Point latest_model.pkl at the same bytes instead of pickling the forest a second time.
+    # The link is swapped in with os.replace so a reader never sees a partial file.
+    tmp_path = latest_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(filepath, tmp_path)
+    except OSError:
+        shutil.copyfile(filepath, tmp_path)
+    os.replace(tmp_path, latest_path)
 
 def load_latest_checkpoint():
     latest_path = os.path.join(CHECKPOINT_DIR, "latest_model.pkl")
     if os.path.exists(latest_path):
         print(f"\n[Checkpoint] Loading latest model from: {latest_path}")
-        return joblib.load(latest_path)
+        model = joblib.load(latest_path)
+        # n_jobs=-1 is for training; at inference the pool overhead outweighs per-query work
+        model.set_params(clf__n_jobs=1)
+        return model
     else:
         return None
 
@@ -90,15 +119,28 @@ if model is None:
     print("Training Complete.")
     
     save_checkpoint(model)
+    model.set_params(clf__n_jobs=1)
+
+def classify_errors(log_line_dicts):
+    """Classify a batch of error logs with a single predict_proba pass through the pipeline."""
+    if not log_line_dicts:
+        return []
+
+    input_texts = [
+        f"{d['Service']} {d['Error_Category']} {d['Raw_Input_Snippet']}"
+        for d in log_line_dicts
+    ]
+
+    # predict() is argmax(predict_proba), so one pass gives both the label and its confidence
+    probs = model.predict_proba(input_texts)
+    best = probs.argmax(axis=1)
+    predictions = model.classes_[best]
+    confidences = probs[np.arange(len(input_texts)), best] * 100
+
+    return list(zip(predictions, confidences))
 
 def classify_error(log_line_dict):
-    input_text = f"{log_line_dict['Service']} {log_line_dict['Error_Category']} {log_line_dict['Raw_Input_Snippet']}"
-    
-    prediction = model.predict([input_text])[0]
-    probs = model.predict_proba([input_text])
-    confidence = np.max(probs) * 100
-    
-    return prediction, confidence
+    return classify_errors([log_line_dict])[0]
 
 if os.path.exists(INPUT_EXAMPLES_PATH):
     with open(INPUT_EXAMPLES_PATH, 'r', encoding='utf-8') as f:
@@ -112,9 +154,8 @@ if os.path.exists(INPUT_EXAMPLES_PATH):
         vector_kb = initialize_vector_db()
         
         print("\n--- Running Inference (Vector DB) ---")
-        for new_error in new_errors:
-            result = vector_kb.search(new_error['Raw_Input_Snippet'])
-            
+        results = vector_kb.search_batch([new_error['Raw_Input_Snippet'] for new_error in new_errors])
+        for new_error, result in zip(new_errors, results):
             print(f"Input Snippet: {new_error['Raw_Input_Snippet']}")
             print(f"AI Classification: {result['doc_path']}")
             print(f"Source: {result['source']}")
@@ -1,8 +1,26 @@
 import os
-import glob
+import json
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer, util
-from constants import EMBEDDING_MODEL, DOCS_ROOT_DIR
+from constants import EMBEDDING_MODEL, DOCS_ROOT_DIR, MODELS_DIR, DOC_EMBEDDINGS_PATH, DOC_EMBEDDINGS_MANIFEST_PATH
+from doc_scanner import get_all_doc_files
+
+# One model per name, shared by every DocumentationSearchEngine and VectorKnowledgeBase
+_models = {}
+# Engines are constructed on parallel threads at API startup; the second caller waits for the load
+_models_lock = threading.Lock()
+
+def get_model(model_name):
+    """Return the shared SentenceTransformer for model_name, loading it on first use."""
+    with _models_lock:
+        if model_name not in _models:
+            print(f"Loading Embedding Model ({model_name})...")
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
 
 class DocumentationSearchEngine:
     def __init__(self, docs_root_dir=None, model_name=None):
@@ -11,44 +29,106 @@ class DocumentationSearchEngine:
         self.docs_root_dir = docs_root_dir
         if model_name is None:
             model_name = EMBEDDING_MODEL
-        print(f"Loading Embedding Model ({model_name})...")
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.model = get_model(model_name)
         
         self.doc_paths = []
         self.doc_embeddings = None
+        # Repeated snippets (API fallbacks, retried queries) skip re-encoding
+        self._encode_query = functools.lru_cache(maxsize=4096)(self._encode_query_uncached)
 
         self._index_documents()
 
+    @staticmethod
+    def _read_document(filepath):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _docs_manifest(self, files):
+        """Describe the indexed docs by path, mtime and size (no file reads)."""
+        entries = []
+        for filepath in files:
+            stat = os.stat(filepath)
+            entries.append([filepath, stat.st_mtime_ns, stat.st_size])
+        return {'model_name': self.model_name, 'normalized': True, 'files': entries}
+
+    def _load_cached_embeddings(self, manifest):
+        if not os.path.exists(DOC_EMBEDDINGS_PATH) or not os.path.exists(DOC_EMBEDDINGS_MANIFEST_PATH):
+            return None
+        try:
+            with open(DOC_EMBEDDINGS_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                if json.load(f) != manifest:
+                    return None
+            embeddings = np.load(DOC_EMBEDDINGS_PATH)
+            return torch.from_numpy(embeddings).to(self.model.device)
+        except (OSError, ValueError) as e:
+            print(f"[Warning] Could not load cached embeddings: {e}")
+            return None
+
+    def _save_cached_embeddings(self, manifest):
+        # Both files are written to temp paths and swapped in with os.replace. The old manifest
+        # is removed before the embeddings are replaced and the new one goes in last, so an
+        # interrupted save can only leave a cache miss, never a manifest matching the wrong array.
+        embeddings_tmp = DOC_EMBEDDINGS_PATH + '.tmp'
+        manifest_tmp = DOC_EMBEDDINGS_MANIFEST_PATH + '.tmp'
+        try:
+            os.makedirs(MODELS_DIR, exist_ok=True)
+            # A file object keeps np.save from appending .npy to the temp name
+            with open(embeddings_tmp, 'wb') as f:
+                np.save(f, self.doc_embeddings.cpu().numpy())
+            with open(manifest_tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            if os.path.exists(DOC_EMBEDDINGS_MANIFEST_PATH):
+                os.remove(DOC_EMBEDDINGS_MANIFEST_PATH)
+            os.replace(embeddings_tmp, DOC_EMBEDDINGS_PATH)
+            os.replace(manifest_tmp, DOC_EMBEDDINGS_MANIFEST_PATH)
+        except OSError as e:
+            print(f"[Warning] Could not save embeddings cache: {e}")
+
     def _index_documents(self):
         print("Indexing documentation files...")
         doc_contents = []
         
-        search_pattern = os.path.join(self.docs_root_dir, '**', '*.md')
-        files = glob.glob(search_pattern, recursive=True)
+        files = get_all_doc_files(self.docs_root_dir)
         
         if not files:
             print(f"[Warning] No markdown files found in {self.docs_root_dir}")
             return
 
-        for filepath in files:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
+        # Reuse the embeddings from the previous run if no doc changed
+        manifest = self._docs_manifest(files)
+        cached_embeddings = self._load_cached_embeddings(manifest)
+        if cached_embeddings is not None:
+            self.doc_paths = list(files)
+            self.doc_embeddings = cached_embeddings
+            print(f"Loaded {len(self.doc_paths)} cached document embeddings.")
+            return
+
+        # File reads release the GIL, so overlap them across threads
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            contents = list(executor.map(self._read_document, files))
+
+        for filepath, content in zip(files, contents):
             self.doc_paths.append(filepath)
             
             combined_text = f"Filename: {os.path.basename(filepath)}\nContent: {content}"
             doc_contents.append(combined_text)
 
-        self.doc_embeddings = self.model.encode(doc_contents, convert_to_tensor=True)
+        # Unit-length embeddings turn cosine similarity into a single matrix-vector product
+        self.doc_embeddings = self.model.encode(doc_contents, convert_to_tensor=True, normalize_embeddings=True)
+        self._save_cached_embeddings(manifest)
         print(f"Indexed {len(self.doc_paths)} documents successfully.")
 
+    def _encode_query_uncached(self, error_snippet):
+        return self.model.encode(error_snippet, convert_to_tensor=True, normalize_embeddings=True)
+
     def find_relevant_doc(self, error_snippet, top_k=1):
         if self.doc_embeddings is None:
             return "No docs indexed", 0.0
 
-        query_embedding = self.model.encode(error_snippet, convert_to_tensor=True)
+        query_embedding = self._encode_query(error_snippet)
 
-        cos_scores = util.cos_sim(query_embedding, self.doc_embeddings)[0]
+        cos_scores = util.dot_score(query_embedding, self.doc_embeddings)[0]
 
         top_result = torch.topk(cos_scores, k=top_k)
         
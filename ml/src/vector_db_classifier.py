@@ -2,17 +2,46 @@ import pandas as pd
 import chromadb
 from chromadb.utils import embedding_functions
 import os
+import uuid
 from constants import DATASET_PATH, DOCS_ROOT_DIR, EMBEDDING_MODEL, CHROMA_DB_DIR
+from semantic_search import get_model
+
+# One client per database path, shared by every VectorKnowledgeBase
+_clients = {}
+
+def get_client(db_path):
+    """Return the shared Chroma client for db_path, creating it on first use."""
+    if db_path not in _clients:
+        _clients[db_path] = chromadb.PersistentClient(path=db_path)
+    return _clients[db_path]
+
+class SharedModelEmbeddingFunction(embedding_functions.SentenceTransformerEmbeddingFunction):
+    """
+    Chroma's sentence-transformer embedding function, backed by the SentenceTransformer from
+    semantic_search.get_model instead of a second copy in Chroma's own model cache.
+    Name and config are inherited, so collections created with the stock function still open.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._model = get_model(model_name)
+        self.device = str(self._model.device)
+        self.normalize_embeddings = False
+        self.kwargs = {}
+
+    @staticmethod
+    def build_from_config(config):
+        # Chroma rebuilds the function from its config (e.g. in is_legacy); stay on the shared model
+        return SharedModelEmbeddingFunction(model_name=config.get('model_name', EMBEDDING_MODEL))
+
 
 class VectorKnowledgeBase:
     def __init__(self, db_path=None):
         if db_path is None:
             db_path = CHROMA_DB_DIR
-        self.client = chromadb.PersistentClient(path=db_path)
+        self.client = get_client(db_path)
         
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBEDDING_MODEL
-        )
+        self.embedding_fn = SharedModelEmbeddingFunction(model_name=EMBEDDING_MODEL)
         
         self.docs_col = self.client.get_or_create_collection(
             name="official_docs",
@@ -24,68 +53,78 @@ class VectorKnowledgeBase:
             embedding_function=self.embedding_fn
         )
 
-    def populate_initial_knowledge(self, csv_path):
+    def _read_dataset_records(self, csv_path):
+        """Parse the dataset CSV into (ids, documents, metadatas) for docs_col."""
+        ids = []
+        documents = []
+        metadatas = []
+
+        with open(csv_path, 'r', encoding='utf-8') as fh:
+            # Skip the header line
+            header = fh.readline()
+            
+            for line_number, line in enumerate(fh, start=2):
+                raw_line = line.rstrip('\n')
+                if not raw_line:
+                    continue
+                
+                # 1. Manual parsing logic (like in load_and_prep_data)
+                # Split only on the first 3 commas: Timestamp, Service, Error_Category
+                base_parts = raw_line.split(',', 3)
+                
+                if len(base_parts) < 4:
+                    print(f"[Warning] Line {line_number} skipped (malformed structure)")
+                    continue
+                    
+                # The fourth part contains the Snippet and the Root Cause
+                # We split from the end (rsplit) once to separate the cause
+                try:
+                    raw_snippet, root_cause = base_parts[3].rsplit(',', 1)
+                except ValueError:
+                    print(f"[Warning] Line {line_number} skipped (missing root cause)")
+                    continue
+
+                timestamp = base_parts[0].strip()
+                service = base_parts[1].strip()
+                category = base_parts[2].strip()
+                clean_snippet = raw_snippet.strip()
+                clean_cause = root_cause.strip()
+
+                text_to_embed = f"{service} {category} {clean_snippet}"
+                
+                ids.append(f"err_{line_number}")
+                documents.append(text_to_embed)
+                
+                metadatas.append({
+                    "service": service,
+                    "category": category,
+                    "doc_path": f"{DOCS_ROOT_DIR}/services/{service.lower()}/{category}.md",
+                    "root_cause": clean_cause,
+                    "raw_snippet": clean_snippet
+                })
+
+        return ids, documents, metadatas
+
+    def populate_initial_knowledge(self, csv_path, batch_size=1000):
         if self.docs_col.count() > 0:
             print("Knowledge base already populated. Skipping.")
             return
 
         print(f"Ingesting data from {csv_path}...")
-        
-        ids = []
-        documents = []
-        metadatas = []
 
         try:
-            with open(csv_path, 'r', encoding='utf-8') as fh:
-                # Skip the header line
-                header = fh.readline()
-                
-                for line_number, line in enumerate(fh, start=2):
-                    raw_line = line.rstrip('\n')
-                    if not raw_line:
-                        continue
-                    
-                    # 1. Manual parsing logic (like in load_and_prep_data)
-                    # Split only on the first 3 commas: Timestamp, Service, Error_Category
-                    base_parts = raw_line.split(',', 3)
-                    
-                    if len(base_parts) < 4:
-                        print(f"[Warning] Line {line_number} skipped (malformed structure)")
-                        continue
-                        
-                    # The fourth part contains the Snippet and the Root Cause
-                    # We split from the end (rsplit) once to separate the cause
-                    try:
-                        raw_snippet, root_cause = base_parts[3].rsplit(',', 1)
-                    except ValueError:
-                        print(f"[Warning] Line {line_number} skipped (missing root cause)")
-                        continue
-
-                    timestamp = base_parts[0].strip()
-                    service = base_parts[1].strip()
-                    category = base_parts[2].strip()
-                    clean_snippet = raw_snippet.strip()
-                    clean_cause = root_cause.strip()
-
-                    text_to_embed = f"{service} {category} {clean_snippet}"
-                    
-                    ids.append(f"err_{line_number}")
-                    documents.append(text_to_embed)
-                    
-                    metadatas.append({
-                        "service": service,
-                        "category": category,
-                        "doc_path": f"{DOCS_ROOT_DIR}/services/{service.lower()}/{category}.md",
-                        "root_cause": clean_cause,
-                        "raw_snippet": clean_snippet
-                    })
+            ids, documents, metadatas = self._read_dataset_records(csv_path)
 
             if ids:
-                self.docs_col.add(
-                    ids=ids,
-                    documents=documents,
-                    metadatas=metadatas
-                )
+                # Bulk insert in fixed-size batches: one embedding pass and one
+                # write per batch, and never above Chroma's max batch size
+                for start in range(0, len(ids), batch_size):
+                    end = start + batch_size
+                    self.docs_col.add(
+                        ids=ids[start:end],
+                        documents=documents[start:end],
+                        metadatas=metadatas[start:end]
+                    )
                 print(f"Successfully indexed {len(ids)} records into Vector Store.")
             else:
                 print("No valid records found to index.")
@@ -95,50 +134,109 @@ class VectorKnowledgeBase:
         except Exception as e:
             print(f"An error occurred during ingestion: {e}")
 
+    def sync_with_dataset(self, csv_path, batch_size=1000):
+        """
+        Bring docs_col in line with the dataset CSV, embedding only text that isn't stored yet.
+        Rows are matched by id; a changed or shifted row whose text is already in the collection
+        (e.g. every row after a deleted line) reuses the stored embedding.
+        """
+        print(f"Syncing knowledge base with {csv_path}...")
+        ids, documents, metadatas = self._read_dataset_records(csv_path)
+
+        existing = self.docs_col.get(include=['documents', 'metadatas', 'embeddings'])
+        existing_embeddings = existing['embeddings'] if existing['embeddings'] is not None else []
+        current = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(existing['ids'], existing['documents'], existing['metadatas'])
+        }
+        embedding_by_text = dict(zip(existing['documents'], existing_embeddings))
+
+        changed = [i for i, doc_id in enumerate(ids) if current.get(doc_id) != (documents[i], metadatas[i])]
+
+        # Embed each new text once, in a single pass
+        new_texts = list(dict.fromkeys(documents[i] for i in changed if documents[i] not in embedding_by_text))
+        if new_texts:
+            embedding_by_text.update(zip(new_texts, self.embedding_fn(new_texts)))
+
+        for start in range(0, len(changed), batch_size):
+            batch = changed[start:start + batch_size]
+            self.docs_col.upsert(
+                ids=[ids[i] for i in batch],
+                documents=[documents[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+                embeddings=[embedding_by_text[documents[i]] for i in batch]
+            )
+
+        dataset_ids = set(ids)
+        removed = [doc_id for doc_id in current if doc_id not in dataset_ids]
+        for start in range(0, len(removed), batch_size):
+            self.docs_col.delete(ids=removed[start:start + batch_size])
+
+        print(f"Knowledge base synced: {len(changed)} updated ({len(new_texts)} embedded), {len(removed)} removed.")
+
     def search(self, error_query, threshold=0.3):
         print(f"\n--- Analyzing: '{error_query}' ---")
-        
+        return self.search_batch([error_query], threshold=threshold)[0]
+
+    def search_batch(self, error_queries, threshold=0.3):
+        """Classify several error queries with one query call per collection."""
+        if not error_queries:
+            return []
+
+        results = [None] * len(error_queries)
+
+        # Embed once and reuse the vectors for both collections
+        query_embeddings = self.embedding_fn(error_queries)
+
         # Step 1: Check dynamic memory (Feedback)
-        # We look for the single best result
-        feedback_results = self.feedback_col.query(
-            query_texts=[error_query],
-            n_results=1
-        )
-        
-        # Check if something relevant was found (Low Distance = High Similarity)
-        # In Chroma, the distance is L2 or Cosine. Default is L2: lower is better.
-        # Assume a distance less than 0.5 is a good match.
-        if feedback_results['ids'][0]:
-            distance = feedback_results['distances'][0][0]
-            if distance < 0.4: # Strict threshold for feedback
-                metadata = feedback_results['metadatas'][0][0]
-                return {
-                    "source": "LEARNED_MEMORY (Feedback)",
-                    "doc_path": metadata['correct_doc_path'],
-                    "confidence": "High",
-                    "reason": "Previous user correction matched"
-                }
+        # We look for the single best result for every query at once,
+        # skipping the lookup entirely until a correction has been taught
+        if self.feedback_col.count() > 0:
+            feedback_results = self.feedback_col.query(
+                query_embeddings=query_embeddings,
+                n_results=1
+            )
+            
+            # Check if something relevant was found (Low Distance = High Similarity)
+            # In Chroma, the distance is L2 or Cosine. Default is L2: lower is better.
+            # Assume a distance less than 0.5 is a good match.
+            for i in range(len(error_queries)):
+                if feedback_results['ids'][i]:
+                    distance = feedback_results['distances'][i][0]
+                    if distance < 0.4: # Strict threshold for feedback
+                        metadata = feedback_results['metadatas'][i][0]
+                        results[i] = {
+                            "source": "LEARNED_MEMORY (Feedback)",
+                            "doc_path": metadata['correct_doc_path'],
+                            "confidence": "High",
+                            "reason": "Previous user correction matched"
+                        }
+
+        # Step 2: Queries without feedback go to the official knowledge base
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
 
-        # Step 2: If no feedback, search in official knowledge base
         doc_results = self.docs_col.query(
-            query_texts=[error_query],
+            query_embeddings=[query_embeddings[i] for i in pending],
             n_results=1
         )
         
-        if doc_results['ids'][0]:
-            metadata = doc_results['metadatas'][0][0]
-            return {
-                "source": "OFFICIAL_KNOWLEDGE",
-                "doc_path": metadata['doc_path'],
-                "confidence": "Normal",
-                "root_cause": metadata['root_cause']
-            }
-            
-        return {"source": "UNKNOWN", "doc_path": "N/A"}
+        for row, i in enumerate(pending):
+            if doc_results['ids'][row]:
+                metadata = doc_results['metadatas'][row][0]
+                results[i] = {
+                    "source": "OFFICIAL_KNOWLEDGE",
+                    "doc_path": metadata['doc_path'],
+                    "confidence": "Normal",
+                    "root_cause": metadata['root_cause']
+                }
+            else:
+                results[i] = {"source": "UNKNOWN", "doc_path": "N/A"}
+
+        return results
 
     def teach_system(self, error_text, correct_doc_path):
-        import uuid
-        
         correction_id = f"fix_{uuid.uuid4().hex[:8]}"
         
         print(f"[Learning] Saving correction to Vector DB...")
@@ -57,13 +57,24 @@ function ManageDocsPage() {
         }
     };
 
-    const handleOpenDialog = (doc = null) => {
+    const handleOpenDialog = async (doc = null) => {
         if (doc) {
+            // The docs list carries no content; load it only for the file being edited
+            let content = '';
+            try {
+                const response = await axios.get('/api/doc-content', {
+                    params: { path: doc.path },
+                });
+                content = response.data.content;
+            } catch (err) {
+                setError('Failed to load documentation content');
+                return;
+            }
             setEditingDoc(doc);
             setFormData({
                 service: doc.service,
                 category: doc.category,
-                content: doc.content,
+                content: content,
                 path: doc.path,
             });
         } else {